@@ -1,17 +1,14 @@
-import sys
-from .dimjournal import download
-
-if sys.version_info[:2] >= (3, 8):
-    # TODO: Import directly (no need for conditional) when `python_requires = >= 3.8`
-    from importlib.metadata import PackageNotFoundError, version  # pragma: no cover
-else:
-    from importlib_metadata import PackageNotFoundError, version  # pragma: no cover
-
 try:
-    # Change here if project is renamed and does not equal the package name
-    dist_name = __name__
-    __version__ = version(dist_name)
-except PackageNotFoundError:  # pragma: no cover
+    # Written by setuptools_scm at build/install time
+    from ._version import __version__
+except ImportError:  # pragma: no cover
     __version__ = "unknown"
-finally:
-    del version, PackageNotFoundError
+
+
+def __getattr__(name):
+    # Load the Selenium-backed implementation only when it is first used
+    if name == "download":
+        from .dimjournal import download
+
+        return download
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,13 +1,55 @@
 #!/usr/bin/env python3
 
-import fire
-from pathlib import Path
-from .dimjournal import download
+import argparse
+
+
+def parse_args(argv=None):
+    """
+    Parse the command line arguments of the `download` function.
+
+    Args:
+        argv (Optional[List[str]]): The arguments to parse, defaults to sys.argv.
+
+    Returns:
+        argparse.Namespace: The keyword arguments for `download`.
+    """
+    parser = argparse.ArgumentParser(
+        prog="dimjournal", description="Download images from the Midjourney API."
+    )
+    parser.add_argument(
+        "--archive_folder",
+        "--archive-folder",
+        help="The path to the archive folder.",
+    )
+    parser.add_argument("--user_id", "--user-id", help="The user ID.")
+    parser.add_argument(
+        "--limit", type=int, help="The maximum number of pages to download."
+    )
+    # Also accept the folder as the first argument, like `dimjournal <folder>`
+    parser.add_argument(
+        "archive_folder_arg",
+        nargs="?",
+        metavar="archive_folder",
+        help="The path to the archive folder, same as --archive_folder.",
+    )
+    args = parser.parse_args(argv)
+    folder_arg = args.__dict__.pop("archive_folder_arg")
+    if folder_arg is not None:
+        if args.archive_folder is not None:
+            parser.error(
+                "give the archive folder either as an argument "
+                "or with --archive_folder, not both"
+            )
+        args.archive_folder = folder_arg
+    return args
 
 
 def cli():
-    fire.core.Display = lambda lines, out: print(*lines, file=out)
-    fire.Fire(download)
+    args = parse_args()
+    # Imported here so that `--help` does not pay for the Selenium stack
+    from .dimjournal import download
+
+    download(**vars(args))
 
 
 if __name__ == "__main__":
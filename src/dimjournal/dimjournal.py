@@ -1,27 +1,32 @@
 #!/usr/bin/env python3
 
-import base64
+import asyncio
 import datetime as dt
+import functools
 import io
 import itertools
-import json
 import logging
+import os
 import pickle
+import struct
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
 from typing import List
 from urllib.parse import urlparse
 
-import numpy as np
-import pymtpng
+import httpx
+import orjson
 import undetected_chromedriver as webdriver
-from bs4 import BeautifulSoup
-from PIL import Image
 from selenium.common.exceptions import InvalidCookieDomainException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 from slugify import slugify
 from tqdm import tqdm
+from tqdm.asyncio import tqdm as tqdm_asyncio
 
 _log = logging.getLogger("dimjournal")
 
@@ -38,8 +43,156 @@ class Constants:
     job_details = ["id", "enqueue_time", "prompt"]
     user_json = Path("user.json")
     jobs_upscaled_json = Path("jobs_upscaled.json")
+    cookies_json = Path("cookies.json")
     cookies_pkl = Path("cookies.pkl")
-    mj_download_image_js = """var callback=arguments[arguments.length-1];function getDataUri(e,n){var a=new XMLHttpRequest;a.onload=function(){var e=new FileReader;e.onloadend=function(){n(e.result)},e.readAsDataURL(a.response)},a.open("GET",e),a.responseType="blob",a.send()}getDataUri(document.querySelector("img").src,function(e){callback(e)});"""
+    download_concurrency = 16
+    write_workers = 4
+    queued_writes = 8
+    crawl_concurrency = 8
+    login_timeout = 60 * 10
+    page_timeout = 60
+    poll_frequency = 0.05
+    checkpoint_interval = 100
+    api_requests_per_second = 8
+    rate_limit_retries = 3
+    stream_chunk_size = 64 * 1024
+    image_types = {
+        "image/png": "png",
+        "image/jpeg": "jpeg",
+        "image/webp": "webp",
+        "image/gif": "gif",
+    }
+    recent_jobs_params = {
+        "orderBy": "new",
+        "jobStatus": "completed",
+        "dedupe": "true",
+        "refreshApi": 0,
+    }
+    # CRC32 state after the chunk type, continued over the chunk data
+    png_chunk_type_crcs = {
+        chunk_type: zlib.crc32(chunk_type) for chunk_type in (b"tEXt", b"iTXt")
+    }
+
+
+def parse_date(date_string: str) -> dt.datetime:
+    """
+    Parse a date string as used by the Midjourney API.
+
+    Args:
+        date_string (str): The date string in the format "%Y-%m-%d %H:%M:%S.%f".
+
+    Returns:
+        datetime: The parsed date.
+    """
+    try:
+        # The C parser is much faster than strptime; older Pythons only accept
+        # 3 or 6 fraction digits, so strptime stays as the fallback
+        return dt.datetime.fromisoformat(date_string)
+    except ValueError:
+        return dt.datetime.strptime(date_string, Constants.date_format)
+
+
+def png_text_chunk(keyword: str, text: str) -> bytes:
+    """
+    Build a PNG text chunk, using tEXt for Latin-1 text and iTXt otherwise.
+
+    Args:
+        keyword (str): The keyword of the chunk, like "Title".
+        text (str): The text of the chunk.
+
+    Returns:
+        bytes: The chunk, including its length and CRC.
+    """
+    try:
+        chunk_type = b"tEXt"
+        data = keyword.encode("latin-1") + b"\0" + text.encode("latin-1")
+    except UnicodeEncodeError:
+        # Uncompressed international text with no language tag
+        chunk_type = b"iTXt"
+        data = keyword.encode("latin-1") + b"\0\0\0\0\0" + text.encode("utf-8")
+    return (
+        struct.pack(">I", len(data))
+        + chunk_type
+        + data
+        + struct.pack(">I", zlib.crc32(data, Constants.png_chunk_type_crcs[chunk_type]))
+    )
+
+
+def inject_png_text(image_data: bytes, info: dict) -> bytes:
+    """
+    Add text metadata to PNG data without decoding the image.
+
+    The text chunks are inserted right after the IHDR chunk, the pixel data is
+    copied as is.
+
+    Args:
+        image_data (bytes): The PNG data.
+        info (dict): The metadata, empty values are skipped.
+
+    Returns:
+        bytes: The PNG data with the metadata.
+
+    Raises:
+        ValueError: If the data does not start with a PNG signature and IHDR chunk.
+    """
+    ihdr_end = 8 + 4 + 4 + 13 + 4
+    if (
+        image_data[:8] != b"\x89PNG\r\n\x1a\n"
+        or image_data[8:16] != b"\0\0\0\x0dIHDR"
+        or len(image_data) < ihdr_end
+    ):
+        raise ValueError("Not a PNG file")
+    chunks = [png_text_chunk(key, value) for key, value in info.items() if value]
+    if not chunks:
+        return image_data
+    return b"".join((image_data[:ihdr_end], *chunks, image_data[ihdr_end:]))
+
+
+def write_bytes_atomic(path: Path, data: bytes):
+    """
+    Replace the contents of a file in one step.
+
+    The data goes to a temporary file that is synced to disk and then renamed
+    over the target, so a crash leaves either the old or the new file, never a
+    truncated one.
+
+    Args:
+        path (Path): The path of the file.
+        data (bytes): The new contents.
+    """
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    with open(tmp_path, "wb") as fh:
+        fh.write(data)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp_path, path)
+
+
+def get_url_extension(url: str) -> str:
+    """
+    Get the file extension of the path in the given URL.
+
+    Args:
+        url (str): The URL, like "https://cdn.midjourney.com/<id>/0_0.png".
+
+    Returns:
+        str: The extension without the dot, like "png".
+    """
+    return Path(urlparse(url).path).suffix[1:]
+
+
+@functools.lru_cache(maxsize=4096)
+def slugify_prompt(prompt: str) -> str:
+    """
+    Get the file name slug for the given prompt.
+
+    Args:
+        prompt (str): The prompt.
+
+    Returns:
+        str: The slug, shortened to 49 characters.
+    """
+    return slugify(prompt)[:49]
 
 
 def get_date_ninety_days_prior(date_string: str) -> str:
@@ -53,12 +206,97 @@ def get_date_ninety_days_prior(date_string: str) -> str:
         str: The date string 90 days prior to the given date.
     """
     DAYS_PRIOR = 90
-    date_obj = dt.datetime.strptime(date_string, Constants.date_format)
+    date_obj = parse_date(date_string)
     prev_day_obj = date_obj - dt.timedelta(days=DAYS_PRIOR)
     prev_day_string = prev_day_obj.strftime(Constants.date_format)
     return prev_day_string
 
 
+class CookieUnpickler(pickle.Unpickler):
+    """
+    Unpickler for legacy cookie files that refuses to load any class.
+
+    Browser cookies are plain lists of dicts, so a pickle that references a
+    class or function is not a cookie file and is rejected.
+    """
+
+    def find_class(self, module, name):
+        raise pickle.UnpicklingError(f"Refusing to load {module}.{name}")
+
+
+class RateLimiter:
+    """
+    Space out requests so that no more than a given number start per second.
+
+    The limiter hands out start times instead of sleeping itself, so the same
+    instance can pace both the sync and the async API requests. Callers sleep
+    for the reserved delay and then call `recheck()`, which sends them back to
+    the queue if a pause began while they were waiting.
+
+    Attributes:
+        interval (float): The minimum number of seconds between two requests.
+        next_time (float): The monotonic time at which the next request may start.
+        paused_until (float): The monotonic time at which the last pause ends.
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate
+        self.next_time = 0.0
+        self.paused_until = 0.0
+
+    def reserve(self) -> float:
+        """
+        Reserve the next request slot.
+
+        Returns:
+            float: The number of seconds to wait before sending the request.
+        """
+        now = time.monotonic()
+        start = max(now, self.next_time, self.paused_until)
+        self.next_time = start + self.interval
+        return start - now
+
+    def recheck(self) -> float:
+        """
+        Check a reserved slot once its delay has passed.
+
+        Returns:
+            float: 0 if the request may be sent now, otherwise the number of
+                seconds to wait for a new slot after the current pause.
+        """
+        if time.monotonic() < self.paused_until:
+            return self.reserve()
+        return 0.0
+
+    def pause(self, seconds: float):
+        """
+        Hold back all further requests, e.g. after the server answered 429.
+
+        Requests that already reserved a slot inside the pause are moved behind
+        it when they call `recheck()`.
+
+        Args:
+            seconds (float): The number of seconds to pause.
+        """
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+def get_retry_after(response: httpx.Response) -> float:
+    """
+    Get the delay requested by the Retry-After header of a response.
+
+    Args:
+        response (httpx.Response): The response.
+
+    Returns:
+        float: The delay in seconds, 1 if the header is missing or is a date.
+    """
+    try:
+        return max(float(response.headers.get("Retry-After", 1)), 0)
+    except ValueError:
+        return 1
+
+
 class MidjourneyAPI:
     """
     A class to interact with the Midjourney API.
@@ -80,6 +318,7 @@ class MidjourneyAPI:
         self.driver = driver
         self.log_in()
         self.get_user_info()
+        self.rate_limiter = RateLimiter(Constants.api_requests_per_second)
 
     def log_in(self) -> bool:
         """
@@ -89,18 +328,43 @@ class MidjourneyAPI:
             bool: True if login is successful, False otherwise.
         """
 
+    def read_cookies(self) -> List[dict]:
+        """
+        Read the saved browser cookies.
+
+        Cookies saved as `cookies.pkl` by older versions are read if there is no
+        `cookies.json` yet; they are rewritten as JSON after the next log in.
+
+        Returns:
+            List[dict]: The cookies, empty if none could be read.
+        """
+        legacy_path = Path(self.archive_folder, Constants.cookies_pkl)
+        try:
+            if self.cookies_path.is_file():
+                return orjson.loads(self.cookies_path.read_bytes())
+            if legacy_path.is_file():
+                with open(legacy_path, "rb") as file:
+                    cookies = CookieUnpickler(file).load()
+                if not isinstance(cookies, list) or not all(
+                    isinstance(cookie, dict) for cookie in cookies
+                ):
+                    raise pickle.UnpicklingError("Not a list of cookies")
+                return cookies
+        except (orjson.JSONDecodeError, EOFError, pickle.UnpicklingError) as e:
+            _log.warning(f"Ignoring unreadable cookies: {str(e)}")
+        return []
+
     def load_cookies(self):
-        self.cookies_path = Path(self.archive_folder, Constants.cookies_pkl)
-        if self.cookies_path.is_file():
-            cookies = pickle.load(open(self.cookies_path, "rb"))
-            for cookie in cookies:
-                try:
-                    self.driver.add_cookie(cookie)
-                except InvalidCookieDomainException:
-                    pass
+        self.cookies_path = Path(self.archive_folder, Constants.cookies_json)
+        for cookie in self.read_cookies():
+            try:
+                self.driver.add_cookie(cookie)
+            except InvalidCookieDomainException:
+                pass
 
     def save_cookies(self):
-        pickle.dump(self.driver.get_cookies(), open(self.cookies_path, "wb"))
+        write_bytes_atomic(self.cookies_path, orjson.dumps(self.driver.get_cookies()))
+        Path(self.archive_folder, Constants.cookies_pkl).unlink(missing_ok=True)
 
     def log_in(self) -> bool:
         """
@@ -112,8 +376,14 @@ class MidjourneyAPI:
         self.load_cookies()
         try:
             self.driver.get(Constants.home_url)
-            WebDriverWait(self.driver, 60 * 10).until(EC.url_to_be(Constants.app_url))
-            WebDriverWait(self.driver, 60 * 10).until(
+            # Logging in is done by hand in the browser, so allow for plenty of time
+            wait = WebDriverWait(
+                self.driver,
+                Constants.login_timeout,
+                poll_frequency=Constants.poll_frequency,
+            )
+            wait.until(EC.url_to_be(Constants.app_url))
+            wait.until(
                 EC.presence_of_element_located((By.ID, Constants.app_element_id))
             )
             cookie = self.driver.get_cookie(Constants.session_token_cookie)
@@ -131,23 +401,24 @@ class MidjourneyAPI:
         self.user_info = {}
         self.user_json = Path(self.archive_folder, Constants.user_json)
         if self.user_json.is_file():
-            self.user_info = json.loads(self.user_json.read_text())
+            self.user_info = orjson.loads(self.user_json.read_bytes())
         else:
             self.user_info = self.fetch_user_info()
             if self.user_info:
-                self.user_json.write_text(json.dumps(self.user_info))
+                write_bytes_atomic(self.user_json, orjson.dumps(self.user_info))
 
     def fetch_user_info(self):
         try:
             self.driver.get(Constants.account_url)
-            WebDriverWait(self.driver, 60 * 10).until(
+            script_tag = WebDriverWait(
+                self.driver,
+                Constants.page_timeout,
+                poll_frequency=Constants.poll_frequency,
+            ).until(
                 EC.presence_of_element_located((By.ID, Constants.account_element_id))
             )
-            soup = BeautifulSoup(self.driver.page_source, "html.parser")
-            script_tag_contents = soup.find(
-                "script", id=Constants.account_element_id
-            ).text
-            return json.loads(script_tag_contents)
+            # Only the script text crosses the driver connection, not the page
+            return orjson.loads(script_tag.get_attribute("textContent"))
         except Exception as e:
             _log.error(f"Failed to get user info: {str(e)}")
             return None
@@ -160,15 +431,44 @@ class MidjourneyAPI:
         else:
             return False
 
-    def request_recent_jobs(
+    def http_client_kwargs(self) -> dict:
+        """
+        Get the session state of the browser for use with a plain HTTP client.
+
+        Returns:
+            dict: The `cookies` and `headers` keyword arguments for `httpx`.
+        """
+        cookies = httpx.Cookies()
+        for cookie in self.driver.get_cookies():
+            cookies.set(
+                cookie["name"],
+                cookie["value"],
+                domain=cookie.get("domain", ""),
+                path=cookie.get("path", "/"),
+            )
+        user_agent = self.driver.execute_script("return navigator.userAgent")
+        return {"cookies": cookies, "headers": {"User-Agent": user_agent}}
+
+    def refresh_http_session(self, client: httpx.AsyncClient):
+        """
+        Copy the current session state of the browser into an HTTP client.
+
+        Args:
+            client (httpx.AsyncClient): The client to refresh.
+        """
+        kwargs = self.http_client_kwargs()
+        client.cookies = kwargs["cookies"]
+        client.headers.update(kwargs["headers"])
+
+    def recent_jobs_params(
         self,
         from_date: str | None = None,
         page: int | None = None,
         job_type: str | None = None,
         amount: int = 50,
-    ) -> List[dict]:
+    ) -> dict:
         """
-        Request recent jobs from the Midjourney API.
+        Build the query parameters of a recent jobs request.
 
         Args:
             from_date (str | None): The date from which to request jobs.
@@ -177,9 +477,9 @@ class MidjourneyAPI:
             amount (int): The number of jobs to request.
 
         Returns:
-            List[dict]: A list of jobs.
+            dict: The query parameters.
         """
-        params = {}
+        params = {**Constants.recent_jobs_params, "userId": self.user_id}
         if from_date:
             pass  # params["fromDate"] = prev_day(from_date)
         if page:
@@ -187,21 +487,18 @@ class MidjourneyAPI:
         if job_type:
             params["jobType"] = job_type
         params["amount"] = amount
-        params["orderBy"] = "new"
-        params["jobStatus"] = "completed"
-        params["userId"] = self.user_id
-        params["dedupe"] = "true"
-        params["refreshApi"] = 0
+        return params
 
-        query_string = "&".join([f"{k}={v}" for k, v in params.items()])
-        url = f"{Constants.api_url}?{query_string}"
+    def parse_job_listing(self, job_listing) -> List[dict]:
+        """
+        Check the decoded response of a recent jobs request.
 
-        _log.debug(f"Requesting {url}")
-        self.driver.get(url)
-        soup = BeautifulSoup(self.driver.page_source, "html.parser")
-        pre_tag_contents = soup.find("pre").text
-        job_listing = json.loads(pre_tag_contents)
+        Args:
+            job_listing: The decoded JSON response.
 
+        Returns:
+            List[dict]: A list of jobs.
+        """
         if isinstance(job_listing, list):
             if len(job_listing) > 0 and isinstance(job_listing[0], dict):
                 if all(f in job_listing[0] for f in Constants.job_details):
@@ -215,6 +512,92 @@ class MidjourneyAPI:
                 return []
         raise ValueError(job_listing)
 
+    async def aget_api(self, client: httpx.AsyncClient, params: dict) -> httpx.Response:
+        """
+        Send a paced API request asynchronously, waiting out 429 responses.
+
+        Args:
+            client (httpx.AsyncClient): The HTTP client with the session cookies.
+            params (dict): The query parameters.
+
+        Returns:
+            httpx.Response: The response, still 429 if the retries ran out.
+        """
+        for attempt in range(Constants.rate_limit_retries + 1):
+            delay = self.rate_limiter.reserve()
+            while delay > 0:
+                await asyncio.sleep(delay)
+                delay = self.rate_limiter.recheck()
+            response = await client.get(Constants.api_url, params=params)
+            if response.status_code != 429 or attempt == Constants.rate_limit_retries:
+                return response
+            delay = get_retry_after(response)
+            _log.warning(f"Rate limited, retrying in {delay} seconds")
+            self.rate_limiter.pause(delay)
+
+    def request_recent_jobs(
+        self,
+        from_date: str | None = None,
+        page: int | None = None,
+        job_type: str | None = None,
+        amount: int = 50,
+    ) -> List[dict]:
+        """
+        Request recent jobs from the Midjourney API.
+
+        A blocking wrapper around `arequest_recent_jobs` for one-off requests.
+
+        Args:
+            from_date (str | None): The date from which to request jobs.
+            page (int | None): The page number to request.
+            job_type (str | None): The type of job to request.
+            amount (int): The number of jobs to request.
+
+        Returns:
+            List[dict]: A list of jobs.
+        """
+
+        async def request():
+            async with httpx.AsyncClient(
+                **self.http_client_kwargs(), http2=True
+            ) as client:
+                return await self.arequest_recent_jobs(
+                    client, from_date, page, job_type, amount
+                )
+
+        return asyncio.run(request())
+
+    async def arequest_recent_jobs(
+        self,
+        client: httpx.AsyncClient,
+        from_date: str | None = None,
+        page: int | None = None,
+        job_type: str | None = None,
+        amount: int = 50,
+    ) -> List[dict]:
+        """
+        Request recent jobs from the Midjourney API asynchronously.
+
+        Args:
+            client (httpx.AsyncClient): The HTTP client with the session cookies.
+            from_date (str | None): The date from which to request jobs.
+            page (int | None): The page number to request.
+            job_type (str | None): The type of job to request.
+            amount (int): The number of jobs to request.
+
+        Returns:
+            List[dict]: A list of jobs.
+        """
+        params = self.recent_jobs_params(from_date, page, job_type, amount)
+        _log.debug(f"Requesting {Constants.api_url} with {params}")
+        response = await self.aget_api(client, params)
+        if response.status_code in (401, 403):
+            # The session cookies may have been rotated by the browser
+            self.refresh_http_session(client)
+            response = await self.aget_api(client, params)
+        response.raise_for_status()
+        return self.parse_job_listing(response.json())
+
 
 class MidjourneyJobCrawler:
     def __init__(
@@ -236,37 +619,89 @@ class MidjourneyJobCrawler:
         else:
             self.archive_file = Path("jobs.json")
         self.archive_file = self.archive_folder / self.archive_file
+        self.journal_file = self.archive_file.with_suffix(".jsonl")
         self.archive_data = []
+        self.archive_ids = set()
 
     def load_archive_data(self):
         """
-        Load the archive data.
+        Load the archive data, including jobs journaled by an unfinished crawl.
         """
         if self.archive_file.is_file():
-            self.archive_data = json.loads(self.archive_file.read_text())
+            self.archive_data = orjson.loads(self.archive_file.read_bytes())
         else:
             self.archive_data = []
+        self.archive_ids = {job["id"] for job in self.archive_data}
+        if self.journal_file.is_file():
+            journal = []
+            with open(self.journal_file, "rb") as file:
+                for line in file:
+                    try:
+                        journal.append(orjson.loads(line))
+                    except orjson.JSONDecodeError:
+                        _log.debug(f"Skipping truncated line in {self.journal_file}")
+            self.merge_jobs(journal)
+            self.save_archive_data()
+
+    def save_archive_data(self):
+        """
+        Save the archive data and discard the journal.
+        """
+        write_bytes_atomic(
+            self.archive_file,
+            orjson.dumps(self.archive_data, option=orjson.OPT_INDENT_2),
+        )
+        self.journal_file.unlink(missing_ok=True)
+
+    def flush(self):
+        """
+        Fold the journal into the archive if any jobs were added since the last save.
+        """
+        if self.journal_file.is_file():
+            self.save_archive_data()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.flush()
+
+    def merge_jobs(self, job_listing: List[dict]) -> List[dict]:
+        """
+        Add the jobs that are not in the archive yet to the archive data.
+
+        Args:
+            job_listing (List[dict]): The job listing.
+
+        Returns:
+            List[dict]: The jobs that were added.
+        """
+        new_entries = []
+        for job in job_listing:
+            if job["id"] not in self.archive_ids:
+                self.archive_ids.add(job["id"])
+                new_entries.append(job)
+        self.archive_data.extend(new_entries)
+        return new_entries
 
     def update_archive_data(self, job_listing: List[dict]):
         """
         Update the archive data with the given job listing.
 
+        New jobs are appended to the journal, the archive file itself is only
+        rewritten by `save_archive_data` once the crawl is done.
+
         Args:
             job_listing (List[dict]): The job listing.
 
         Returns:
             bool: True if the archive data was updated, False otherwise.
         """
-        new_entries = [
-            job
-            for job in job_listing
-            if job["id"] not in [x["id"] for x in self.archive_data]
-        ]
-        if new_entries:
-            self.archive_data.extend(new_entries)
-            self.archive_file.write_text(json.dumps(self.archive_data, indent=2))
-        else:
+        new_entries = self.merge_jobs(job_listing)
+        if not new_entries:
             return False
+        with open(self.journal_file, "ab") as file:
+            file.writelines(orjson.dumps(job) + b"\n" for job in new_entries)
         return True
 
     def crawl(
@@ -277,27 +712,161 @@ class MidjourneyJobCrawler:
         """
         Crawl the Midjourney API for job listings.
 
+        Args:
+            limit (Optional[int]): The maximum number of pages to crawl.
+            from_date (Optional[str]): The date from which to start crawling.
+        """
+        asyncio.run(self.crawl_async(limit=limit, from_date=from_date))
+
+    async def crawl_async(
+        self,
+        limit: int | None = None,
+        from_date: str | None = None,
+    ):
+        """
+        Crawl the Midjourney API for job listings, requesting several pages at once.
+
+        Pages are requested in batches of `Constants.crawl_concurrency` and merged
+        in page order, so the crawl stops at the same page as a sequential one.
+        If the archive already has jobs, the first page is requested on its own.
+
         Args:
             limit (Optional[int]): The maximum number of pages to crawl.
             from_date (Optional[str]): The date from which to start crawling.
         """
         job_str = self.job_type if self.job_type else "all"
         self.load_archive_data()
-        pages = range(1, limit + 1) if limit else itertools.count(1)
-        for page in tqdm(pages, desc=f"Crawling for {job_str} job info"):
-            job_listing = self.api.request_recent_jobs(
-                from_date=from_date, page=page, job_type=self.job_type
-            )
+        # Jobs archived by earlier runs, as opposed to ones merged during this crawl
+        known_ids = frozenset(self.archive_ids)
+        pages = iter(range(1, limit + 1) if limit else itertools.count(1))
+        # Fold the journal into the archive even if the crawl was interrupted
+        with self:
+            async with httpx.AsyncClient(
+                **self.api.http_client_kwargs(), http2=True
+            ) as client:
+                with tqdm(total=limit, desc=f"Crawling for {job_str} job info") as pbar:
+                    # An incremental crawl usually ends on the first page, so only
+                    # fan out once that page turned out to hold nothing archived
+                    batch_size = 1 if known_ids else Constants.crawl_concurrency
+                    while batch := list(itertools.islice(pages, batch_size)):
+                        batch_size = Constants.crawl_concurrency
+                        job_listings = await asyncio.gather(
+                            *(
+                                self.api.arequest_recent_jobs(
+                                    client,
+                                    from_date=from_date,
+                                    page=page,
+                                    job_type=self.job_type,
+                                )
+                                for page in batch
+                            ),
+                            # A failed page only matters if the crawl gets to it
+                            return_exceptions=True,
+                        )
+                        if not self.merge_job_listings(job_listings, known_ids, pbar):
+                            break
+                        if from_date is None:
+                            from_date = job_listings[0][0]["enqueue_time"]
+
+    def merge_job_listings(
+        self,
+        job_listings: List[List[dict]],
+        known_ids: frozenset = frozenset(),
+        pbar=None,
+    ) -> bool:
+        """
+        Merge a batch of job listing pages into the archive data, in page order.
+
+        Listings are newest first, so once a page reaches jobs that were archived
+        by an earlier run, the following pages hold nothing new. A page that
+        failed to load is only raised once the merge reaches it, so errors on
+        pages past the end of the crawl are ignored.
+
+        Args:
+            job_listings (List[List[dict] | BaseException]): The job listings of
+                consecutive pages, or the exceptions raised while requesting them.
+            known_ids (frozenset): The IDs archived before the crawl started.
+            pbar (Optional[tqdm]): The progress bar to advance per page.
+
+        Returns:
+            bool: True if the crawl should continue with the next batch.
+
+        Raises:
+            BaseException: The exception of the first failed page the merge reaches.
+        """
+        job_str = self.job_type if self.job_type else "all"
+        for job_listing in job_listings:
+            if isinstance(job_listing, BaseException):
+                raise job_listing
+            if pbar is not None:
+                pbar.update(1)
             if not job_listing:
                 _log.debug(
                     f"Empty {job_str} job listing batch: reached end of total job listing"
                 )
-                break
+                return False
+            reached_archive = any(job["id"] in known_ids for job in job_listing)
             if not self.update_archive_data(job_listing):
                 _log.debug(f"No new {job_str} jobs found: stopping crawler")
-                break
-            if from_date is None:
-                from_date = job_listing[0]["enqueue_time"]
+                return False
+            if reached_archive:
+                _log.debug(f"Reached archived {job_str} jobs: stopping crawler")
+                return False
+        return True
+
+
+async def crawl_all(
+    crawlers: List[MidjourneyJobCrawler],
+    limit: int | None = None,
+):
+    """
+    Run several crawlers at the same time.
+
+    Each crawler has its own archive file and HTTP client, so their requests
+    can interleave freely; only the browser session is shared.
+
+    Args:
+        crawlers (List[MidjourneyJobCrawler]): The crawlers to run.
+        limit (Optional[int]): The maximum number of pages each crawler crawls.
+    """
+    await asyncio.gather(*(crawler.crawl_async(limit=limit) for crawler in crawlers))
+
+
+@dataclass(slots=True)
+class DownloadSession:
+    """
+    The resources shared by the downloads of one run.
+
+    Attributes:
+        client (httpx.AsyncClient): The HTTP client with the session cookies.
+        download_slots (asyncio.Semaphore): Limits the fetches in flight.
+        write_slots (asyncio.Semaphore): Limits the fetched images waiting to be
+            written, so they cannot pile up in memory.
+        write_pool (ThreadPoolExecutor): The threads that write the images.
+    """
+
+    client: httpx.AsyncClient
+    download_slots: asyncio.Semaphore
+    write_slots: asyncio.Semaphore
+    write_pool: ThreadPoolExecutor
+
+
+@dataclass(slots=True)
+class PendingJob:
+    """
+    A job whose image still needs to be downloaded.
+
+    Attributes:
+        job (dict): The job listing, updated in place once archived.
+        image_url (str): The URL of the image.
+        image_path (Path): The path to write the image.
+        info (dict): The metadata to embed into the image.
+    """
+
+    job: dict
+    image_url: str
+    image_path: Path
+    info: dict
 
 
 class MidjourneyDownloader:
@@ -313,24 +882,36 @@ class MidjourneyDownloader:
         self.archive_folder = Path(archive_folder)
         self.archive_folder.mkdir(parents=True, exist_ok=True)
         self.jobs_json_path = Path(self.archive_folder, "jobs_upscale.json")
+        self.journal_file = self.jobs_json_path.with_suffix(".arch.jsonl")
         self.jobs_upscale = self.read_jobs()
+        if self.journal_file.is_file():
+            # Compact the replayed journal so that new records are not appended
+            # after a line torn by the interrupted run
+            self.save_jobs()
+        self.month_folders = {}
+        self.existing_files = self.scan_existing_files()
+        self.downloaded = 0
 
-    def fetch_image(self, url):
+    async def stream_image(self, response, image_path):
         """
-        Fetch an image from the given URL.
+        Stream the body of an image response into the given path.
 
-        Args:
-            url (str): The URL of the image.
+        The data goes to a `.part` file first, so an interrupted download does not
+        leave a truncated image that later runs would skip.
 
-        Returns:
-            Tuple[bytes, str]: The image data and the image type.
+        Args:
+            response (httpx.Response): The streamed image response.
+            image_path (Path): The path to write the image.
         """
-        self.api.driver.get(url)
-        data_uri = self.api.driver.execute_async_script(Constants.mj_download_image_js)
-        header, encoded = data_uri.split(",", 1)
-        image_type = header.split(";")[0].split("/")[-1]
-        image_data = base64.b64decode(encoded)
-        return image_data, image_type
+        part_path = image_path.with_name(f"{image_path.name}.part")
+        try:
+            with open(part_path, "wb") as fh:
+                async for chunk in response.aiter_bytes(Constants.stream_chunk_size):
+                    fh.write(chunk)
+        except BaseException:
+            part_path.unlink(missing_ok=True)
+            raise
+        os.replace(part_path, image_path)
 
     def read_jobs(self):
         """
@@ -339,17 +920,60 @@ class MidjourneyDownloader:
         Returns:
             List[dict]: The job listings.
         """
-        with open(self.jobs_json_path, "r") as file:
-            return json.load(file)
+        jobs = orjson.loads(self.jobs_json_path.read_bytes())
+        if self.journal_file.exists():
+            # Replay the downloads recorded by an interrupted run
+            jobs_by_id = {job["id"]: job for job in jobs}
+            with open(self.journal_file, "rb") as f:
+                for line in f:
+                    try:
+                        record = orjson.loads(line)
+                    except orjson.JSONDecodeError:
+                        _log.debug(f"Skipping truncated line in {self.journal_file}")
+                        continue
+                    job = jobs_by_id.get(record["id"])
+                    if job is not None:
+                        job.update(record)
+        return jobs
 
     def save_jobs(self):
         """
         Save the job listings.
         """
-        with open(self.jobs_json_path, "w") as file:
-            json.dump(self.jobs_upscale, file, indent=2)
+        write_bytes_atomic(
+            self.jobs_json_path,
+            orjson.dumps(self.jobs_upscale, option=orjson.OPT_INDENT_2),
+        )
+        self.journal_file.unlink(missing_ok=True)
         _log.debug(f"Updated {self.jobs_json_path}")
 
+    def record_download(self, job):
+        """
+        Append the archive fields of a downloaded job to the journal.
+
+        Args:
+            job (dict): The downloaded job.
+        """
+        record = {
+            key: job[key]
+            for key in ("id", "arch", "arch_image_path", "arch_prompt_slug")
+        }
+        with open(self.journal_file, "ab") as f:
+            f.write(orjson.dumps(record) + b"\n")
+
+    def scan_existing_files(self):
+        """
+        Collect the paths of all files already in the archive folder.
+
+        Returns:
+            Set[str]: The paths of the existing files.
+        """
+        return {
+            os.path.join(root, name)
+            for root, _, names in os.walk(self.archive_folder)
+            for name in names
+        }
+
     def create_folders(self, dt_obj):
         """
         Create folders for the given date.
@@ -360,19 +984,60 @@ class MidjourneyDownloader:
         Returns:
             Path: The path to the created folder.
         """
-        dt_year = f"{dt_obj.year}"
-        path_year = Path(self.archive_folder, dt_year)
-        path_year.mkdir(parents=True, exist_ok=True)
-        month = f"{dt_obj.month:02}"
-        path_month = Path(path_year, month)
-        path_month.mkdir(parents=True, exist_ok=True)
+        key = (dt_obj.year, dt_obj.month)
+        path_month = self.month_folders.get(key)
+        if path_month is None:
+            path_month = Path(
+                self.archive_folder, f"{dt_obj.year}", f"{dt_obj.month:02}"
+            )
+            path_month.mkdir(parents=True, exist_ok=True)
+            self.month_folders[key] = path_month
         return path_month
 
-    def fetch_and_write_image(self, image_url, image_path, info):
+    def write_image(self, image_path, image_data, image_type, info):
+        """
+        Write an image to the given path, embedding the metadata into PNGs.
+
+        Like `stream_image()`, the image goes to a `.part` file that is renamed
+        into place once complete.
+
+        Args:
+            image_path (Path): The path to write the image.
+            image_data (bytes): The image data.
+            image_type (str): The image type.
+            info (dict): The metadata of the image.
+        """
+        part_path = image_path.with_name(f"{image_path.name}.part")
+        if image_type == "png":
+            try:
+                image_data = inject_png_text(image_data, info)
+            except ValueError:
+                # Let the full decoder make sense of it and re-encode it
+                try:
+                    import numpy as np
+                    import pymtpng
+                    from PIL import Image
+
+                    with Image.open(io.BytesIO(image_data)) as image:
+                        # PIL hands numpy a tobytes() copy; asarray wraps that copy
+                        # where np.array would make a second one
+                        image_array = np.asarray(image)
+                    with open(part_path, "wb") as fh:
+                        pymtpng.encode_png(image_array, fh, info=info)
+                    os.replace(part_path, image_path)
+                    return
+                except Exception as e:
+                    _log.error(f"Fishy PNG: {image_path}")
+        with open(part_path, "wb") as fh:
+            fh.write(image_data)
+        os.replace(part_path, image_path)
+
+    async def fetch_and_write_image(self, session, image_url, image_path, info):
         """
         Fetch an image from the given URL and write it to the given path.
 
         Args:
+            session (DownloadSession): The client, limits and writers of the run.
             image_url (str): The URL of the image.
             image_path (Path): The path to write the image.
             info (dict): The metadata of the image.
@@ -380,69 +1045,151 @@ class MidjourneyDownloader:
         Returns:
             bool: True if the image was successfully fetched and written, False otherwise.
         """
-        if not image_path.is_file():
-            image_data, image_type = self.fetch_image(image_url)
-            if image_type == "png":
+        if str(image_path) in self.existing_files:
+            return False
+        try:
+            async with session.download_slots, session.client.stream(
+                "GET", image_url
+            ) as response:
+                response.raise_for_status()
+                content_type = response.headers.get("Content-Type", "")
+                image_type = Constants.image_types.get(
+                    content_type.partition(";")[0].strip().lower(), "bin"
+                )
+                if image_type != "png":
+                    await self.stream_image(response, image_path)
+                    self.existing_files.add(str(image_path))
+                    return True
+                # PNGs get their metadata inserted, so they are read whole; wait
+                # for a write slot first so fetched bodies cannot pile up in
+                # memory while the writers fall behind
+                await session.write_slots.acquire()
                 try:
-                    image_array = np.array(Image.open(io.BytesIO(image_data)))
-                    with open(image_path, "wb") as fh:
-                        pymtpng.encode_png(image_array, fh, info=info)
-                except Exception as e:
-                    _log.error(f"Fishy PNG: {image_url}")
-                    with open(image_path, "wb") as fh:
-                        fh.write(image_data)
-            else:
-                with open(image_path, "wb") as fh:
-                    fh.write(image_data)
-            return True
-        else:
+                    image_data = await response.aread()
+                except BaseException:
+                    session.write_slots.release()
+                    raise
+        except httpx.HTTPError as e:
+            _log.error(f"Failed to fetch {image_url}: {str(e)}")
             return False
+        # The download slot is free again, so the next fetch overlaps this write
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                session.write_pool,
+                self.write_image,
+                image_path,
+                image_data,
+                image_type,
+                info,
+            )
+        finally:
+            session.write_slots.release()
+        self.existing_files.add(str(image_path))
+        return True
 
-    def download_missing(self):
+    def prepare_job(self, job):
         """
-        Download missing images.
+        Work out where and with which metadata to save the image of a job.
+
+        Args:
+            job (dict): The job.
+
+        Returns:
+            PendingJob: The job ready for download.
         """
+        dt_obj = parse_date(job["enqueue_time"])
+        path_month = self.create_folders(dt_obj)
 
-        with tqdm(total=len(self.jobs_upscale), desc="Downloading") as pbar:
-            last_tick = 0
-            for job_i, job in enumerate(self.jobs_upscale):
-                if not job.get("arch", False):
-                    dt_obj = dt.datetime.strptime(
-                        job["enqueue_time"], Constants.date_format
-                    )
-                    path_month = self.create_folders(dt_obj)
-
-                    dt_stamp = dt_obj.strftime("%Y%m%d-%H%M")
-                    prompt = job.get("prompt", "") or job.get("full_command", "") or ""
-                    image_url = job["image_paths"][0]
-
-                    job["arch_prompt_slug"] = slugify(prompt)[:49]
-                    path_base = (
-                        f"""{dt_stamp}_{job["arch_prompt_slug"]}_{job["id"][:4]}"""
-                    )
-                    path_ext = Path(urlparse(image_url).path).suffix[1:]
-                    image_path = Path(path_month, f"""{path_base}.{path_ext}""")
-                    info = {
-                        "Title": job.get("prompt", ""),
-                        "Author": job.get("username", ""),
-                        "Description": job.get("full_command", ""),
-                        "Copyright": job.get("username", ""),
-                        "Creation Time": job.get("enqueue_time", ""),
-                        "Software": "Midjourney",
-                    }
-                    if self.fetch_and_write_image(image_url, image_path, info):
-                        job["arch"] = True
-                        job["arch_image_path"] = str(
-                            image_path.relative_to(self.archive_folder)
-                        )
+        dt_stamp = dt_obj.strftime("%Y%m%d-%H%M")
+        prompt = job.get("prompt", "") or job.get("full_command", "") or ""
+        image_url = job["image_paths"][0]
 
-                        pbar.set_description(f"{job['arch_image_path']}")
-                        pbar.update(job_i + 1 - last_tick)
-                        last_tick = job_i + 1
-                        _log.debug(
-                            f"""Saving {job["arch_image_path"]} from {image_url}"""
-                        )
-        self.save_jobs()
+        job["arch_prompt_slug"] = slugify_prompt(prompt)
+        path_base = f"""{dt_stamp}_{job["arch_prompt_slug"]}_{job["id"][:4]}"""
+        path_ext = get_url_extension(image_url)
+        image_path = Path(path_month, f"""{path_base}.{path_ext}""")
+        info = {
+            "Title": job.get("prompt", ""),
+            "Author": job.get("username", ""),
+            "Description": job.get("full_command", ""),
+            "Copyright": job.get("username", ""),
+            "Creation Time": job.get("enqueue_time", ""),
+            "Software": "Midjourney",
+        }
+        return PendingJob(job, image_url, image_path, info)
+
+    async def download_job(self, session, pending):
+        """
+        Download the image of a single job into the archive.
+
+        Args:
+            session (DownloadSession): The client, limits and writers of the run.
+            pending (PendingJob): The job to download.
+
+        Returns:
+            bool: True if the image was downloaded, False otherwise.
+        """
+        if await self.fetch_and_write_image(
+            session, pending.image_url, pending.image_path, pending.info
+        ):
+            job = pending.job
+            job["arch"] = True
+            job["arch_image_path"] = str(
+                pending.image_path.relative_to(self.archive_folder)
+            )
+            _log.debug(f"""Saving {job["arch_image_path"]} from {pending.image_url}""")
+            self.record_download(job)
+            self.downloaded += 1
+            if self.downloaded % Constants.checkpoint_interval == 0:
+                self.save_jobs()
+            return True
+        return False
+
+    async def download_all(self, pending):
+        """
+        Download the images of the given jobs concurrently.
+
+        Args:
+            pending (List[PendingJob]): The jobs to download.
+        """
+        with ThreadPoolExecutor(max_workers=Constants.write_workers) as write_pool:
+            async with httpx.AsyncClient(
+                **self.api.http_client_kwargs(), follow_redirects=True
+            ) as client:
+                session = DownloadSession(
+                    client,
+                    asyncio.Semaphore(Constants.download_concurrency),
+                    asyncio.Semaphore(Constants.queued_writes),
+                    write_pool,
+                )
+                downloads = [self.download_job(session, item) for item in pending]
+                for download in tqdm_asyncio.as_completed(
+                    downloads, desc="Downloading"
+                ):
+                    await download
+
+    def download_missing(self):
+        """
+        Download missing images.
+        """
+        pending = {}
+        skipped = 0
+        for job in self.jobs_upscale:
+            if job.get("arch", False):
+                continue
+            if not job.get("image_paths") or not job.get("enqueue_time"):
+                skipped += 1
+                continue
+            item = self.prepare_job(job)
+            # Jobs that map to the same file would race on it; the first one wins,
+            # as it did when the images were downloaded one by one
+            pending.setdefault(item.image_path, item)
+        if skipped:
+            _log.info(f"Skipping {skipped} jobs without an image")
+        try:
+            asyncio.run(self.download_all(list(pending.values())))
+        finally:
+            self.save_jobs()
 
 
 def download(
@@ -475,10 +1222,11 @@ def download(
     api = MidjourneyAPI(driver=driver, archive_folder=archive_folder)
 
     try:
-        crawler = MidjourneyJobCrawler(api, archive_folder, job_type="upscale")
-        crawler.crawl(limit=limit)
-        crawler = MidjourneyJobCrawler(api, archive_folder, job_type=None)
-        crawler.crawl(limit=limit)
+        crawlers = [
+            MidjourneyJobCrawler(api, archive_folder, job_type="upscale"),
+            MidjourneyJobCrawler(api, archive_folder, job_type=None),
+        ]
+        asyncio.run(crawl_all(crawlers, limit=limit))
         downloader = MidjourneyDownloader(api, archive_folder)
         downloader.download_missing()
     except KeyboardInterrupt:
@@ -1,12 +1,287 @@
+import asyncio
+import io
+import pickle
+import time
+
+import httpx
+import orjson
 import pytest
 from dimjournal.dimjournal import (
+    Constants,
     MidjourneyAPI,
     MidjourneyJobCrawler,
     MidjourneyDownloader,
+    RateLimiter,
+    get_url_extension,
+    inject_png_text,
 )
 from pathlib import Path
+from PIL import Image
 import undetected_chromedriver as webdriver
 
 
 def test():
     assert True
+
+
+def test_inject_png_text():
+    buffer = io.BytesIO()
+    Image.new("RGB", (2, 2), "red").save(buffer, format="PNG")
+    info = {"Title": "a cat", "Author": "", "Description": "żółw --v 5"}
+    image = Image.open(io.BytesIO(inject_png_text(buffer.getvalue(), info)))
+    image.load()
+    assert image.text == {"Title": "a cat", "Description": "żółw --v 5"}
+    assert image.getpixel((1, 1)) == (255, 0, 0)
+
+
+def test_inject_png_text_rejects_other_data():
+    with pytest.raises(ValueError):
+        inject_png_text(b"RIFF....WEBP", {"Title": "a cat"})
+
+
+@pytest.mark.parametrize(
+    "url, extension",
+    [
+        ("https://cdn.midjourney.com/abcd/0_0.png", "png"),
+        ("https://cdn.midjourney.com/abcd/0_0.webp?size=1.5#top", "webp"),
+        ("https://cdn.midjourney.com/abcd.efgh/grid", ""),
+        ("https://cdn.midjourney.com", ""),
+        ("https://cdn.midjourney.com/abcd/0_0.png;x=1", "png"),
+        ("https://cdn.midjourney.com/abcd/b.png/", "png"),
+        ("https://cdn.midjourney.com/abcd/..png", "png"),
+        ("https://cdn.midjourney.com/abcd/.png", ""),
+    ],
+)
+def test_get_url_extension(url, extension):
+    assert get_url_extension(url) == extension
+
+
+def test_rate_limiter_spaces_requests():
+    limiter = RateLimiter(rate=4)
+    delays = [limiter.reserve() for _ in range(3)]
+    assert delays[0] == 0
+    assert delays[2] == pytest.approx(0.5, abs=0.05)
+    limiter.pause(10)
+    assert limiter.reserve() == pytest.approx(10, abs=0.05)
+
+
+class RateLimitedClient:
+    def __init__(self, retry_after):
+        self.retry_after = retry_after
+        self.sent = []
+
+    async def get(self, url, params=None):
+        self.sent.append(time.monotonic())
+        status_code = 429 if len(self.sent) == 1 else 200
+        return type(
+            "Response",
+            (),
+            {"status_code": status_code, "headers": {"Retry-After": self.retry_after}},
+        )
+
+
+def test_rate_limit_pause_holds_back_reserved_requests():
+    api = MidjourneyAPI.__new__(MidjourneyAPI)
+    api.rate_limiter = RateLimiter(rate=20)
+    client = RateLimitedClient(retry_after="0.3")
+
+    async def send_all():
+        await asyncio.gather(*(api.aget_api(client, {}) for _ in range(4)))
+
+    asyncio.run(send_all())
+    first, *others = client.sent
+    assert len(others) == 4
+    assert min(others) - first >= 0.3
+
+
+def test_merge_job_listings_stops_at_archived_jobs(tmp_path):
+    crawler = MidjourneyJobCrawler(None, tmp_path, job_type="upscale")
+    crawler.merge_jobs([{"id": "c"}])
+    pages = [[{"id": "a"}], [{"id": "b"}, {"id": "c"}], [{"id": "d"}]]
+    assert not crawler.merge_job_listings(pages, frozenset({"c"}))
+    assert [job["id"] for job in crawler.archive_data] == ["c", "a", "b"]
+
+
+class PagedAPI:
+    def __init__(self, pages):
+        self.pages = pages
+
+    def http_client_kwargs(self):
+        return {}
+
+    async def arequest_recent_jobs(self, client, page=None, **kwargs):
+        result = self.pages[page - 1]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def test_crawl_ignores_errors_past_the_last_page(tmp_path):
+    error = RuntimeError("500 Internal Server Error")
+    api = PagedAPI([[{"id": "a", "enqueue_time": ""}], [{"id": "b"}], [], error])
+    crawler = MidjourneyJobCrawler(api, tmp_path, job_type="upscale")
+    asyncio.run(crawler.crawl_async(limit=4))
+    assert [job["id"] for job in crawler.archive_data] == ["a", "b"]
+    assert (tmp_path / "jobs_upscale.json").is_file()
+
+
+def test_merge_job_listings_raises_failed_page_in_order(tmp_path):
+    crawler = MidjourneyJobCrawler(None, tmp_path, job_type="upscale")
+    with pytest.raises(RuntimeError):
+        crawler.merge_job_listings([[{"id": "a"}], RuntimeError("page 2")])
+    assert [job["id"] for job in crawler.archive_data] == ["a"]
+
+
+def test_downloader_replays_and_compacts_torn_journal(tmp_path):
+    jobs = [{"id": "a"}, {"id": "b"}]
+    (tmp_path / "jobs_upscale.json").write_bytes(orjson.dumps(jobs))
+    (tmp_path / "jobs_upscale.arch.jsonl").write_bytes(
+        b'{"id":"a","arch":true}\n{"id":"zz","ar'
+    )
+    downloader = MidjourneyDownloader(None, tmp_path)
+    assert downloader.jobs_upscale[0]["arch"]
+    assert not downloader.journal_file.exists()
+    downloader.record_download(
+        {"id": "b", "arch": True, "arch_image_path": "b.png", "arch_prompt_slug": ""}
+    )
+    downloader = MidjourneyDownloader(None, tmp_path)
+    assert [job.get("arch") for job in downloader.jobs_upscale] == [True, True]
+
+
+def test_load_archive_data_replays_torn_journal(tmp_path):
+    crawler = MidjourneyJobCrawler(None, tmp_path, job_type="upscale")
+    crawler.archive_file.write_bytes(orjson.dumps([{"id": "a"}]))
+    crawler.journal_file.write_bytes(b'{"id":"b"}\n{"id":"a"}\n{"id":"c')
+    crawler.load_archive_data()
+    assert [job["id"] for job in crawler.archive_data] == ["a", "b"]
+    assert not crawler.journal_file.exists()
+    assert orjson.loads(crawler.archive_file.read_bytes()) == crawler.archive_data
+
+
+def test_download_job_checkpoints_the_job_list(tmp_path, monkeypatch):
+    monkeypatch.setattr(Constants, "checkpoint_interval", 2)
+    jobs = [{"id": id, "enqueue_time": "2023-07-01 12:34:56.123456"} for id in "abc"]
+    (tmp_path / "jobs_upscale.json").write_bytes(orjson.dumps(jobs))
+    downloader = MidjourneyDownloader(None, tmp_path)
+
+    async def fetched(*args):
+        return True
+
+    downloader.fetch_and_write_image = fetched
+    for job in downloader.jobs_upscale[:2]:
+        job["image_paths"] = ["https://cdn.midjourney.com/x/0_0.png"]
+        asyncio.run(downloader.download_job(None, downloader.prepare_job(job)))
+    # The second download triggered a checkpoint, which folds in the journal
+    assert not downloader.journal_file.exists()
+    saved = orjson.loads(downloader.jobs_json_path.read_bytes())
+    assert [job.get("arch") for job in saved] == [True, True, None]
+
+
+class OpenOnUnpickle:
+    def __init__(self, path):
+        self.path = path
+
+    def __reduce__(self):
+        return (open, (str(self.path), "w"))
+
+
+class CookieDriver:
+    def get_cookies(self):
+        return [{"name": "__Secure-next-auth.session-token", "value": "new"}]
+
+
+def cookie_api(tmp_path):
+    api = MidjourneyAPI.__new__(MidjourneyAPI)
+    api.archive_folder = tmp_path
+    api.cookies_path = tmp_path / Constants.cookies_json
+    api.driver = CookieDriver()
+    return api
+
+
+def test_read_cookies_rejects_pickled_code(tmp_path):
+    marker = tmp_path / "unpickled"
+    (tmp_path / Constants.cookies_pkl).write_bytes(
+        pickle.dumps([{"name": "a", "value": OpenOnUnpickle(marker)}])
+    )
+    assert cookie_api(tmp_path).read_cookies() == []
+    assert not marker.exists()
+
+
+def test_read_cookies_migrates_pickle_to_json(tmp_path):
+    cookies = [{"name": "a", "value": "b", "secure": True}]
+    (tmp_path / Constants.cookies_pkl).write_bytes(pickle.dumps(cookies))
+    api = cookie_api(tmp_path)
+    assert api.read_cookies() == cookies
+    api.save_cookies()
+    assert not (tmp_path / Constants.cookies_pkl).exists()
+    assert api.read_cookies() == CookieDriver().get_cookies()
+
+
+class BrokenStream:
+    async def aiter_bytes(self, chunk_size=None):
+        yield b"RIFF"
+        raise ConnectionError("connection reset")
+
+
+def test_stream_image_removes_part_file_on_failure(tmp_path):
+    (tmp_path / "jobs_upscale.json").write_bytes(b"[]")
+    downloader = MidjourneyDownloader(None, tmp_path)
+    image_path = tmp_path / "image.webp"
+    with pytest.raises(ConnectionError):
+        asyncio.run(downloader.stream_image(BrokenStream(), image_path))
+    assert list(tmp_path.glob("image.webp*")) == []
+
+
+class CookieFreeAPI:
+    def http_client_kwargs(self):
+        return {}
+
+
+def test_download_missing_fetches_each_path_once(tmp_path):
+    jobs = [
+        {
+            "id": f"abcd{n}",
+            "enqueue_time": "2023-07-01 12:34:56.123456",
+            "prompt": "a cat",
+            "image_paths": [f"https://cdn.midjourney.com/abcd{n}/0_0.png"],
+        }
+        for n in range(4)
+    ]
+    (tmp_path / "jobs_upscale.json").write_bytes(orjson.dumps(jobs))
+    downloader = MidjourneyDownloader(CookieFreeAPI(), tmp_path)
+    fetched = []
+
+    async def fetch(*args):
+        fetched.append(args)
+        return True
+
+    downloader.fetch_and_write_image = fetch
+    downloader.download_missing()
+    assert len(fetched) == 1
+
+
+class WebpAPI:
+    def http_client_kwargs(self):
+        return {
+            "transport": httpx.MockTransport(
+                lambda request: httpx.Response(
+                    200, content=b"RIFF", headers={"Content-Type": "image/webp"}
+                )
+            )
+        }
+
+
+def test_download_missing_can_run_twice(tmp_path):
+    job = {
+        "id": "abcd1234",
+        "enqueue_time": "2023-07-01 12:34:56.123456",
+        "prompt": "a cat",
+        "image_paths": ["https://cdn.midjourney.com/abcd1234/0_0.webp"],
+    }
+    (tmp_path / "jobs_upscale.json").write_bytes(orjson.dumps([job]))
+    downloader = MidjourneyDownloader(WebpAPI(), tmp_path)
+    downloader.download_missing()
+    downloader.jobs_upscale.append({**job, "id": "efgh5678", "prompt": "a dog"})
+    downloader.download_missing()
+    assert [job.get("arch") for job in downloader.jobs_upscale] == [True, True]
+    assert len(list(tmp_path.glob("2023/07/*.webp"))) == 2